@@ -12,6 +12,7 @@ Uses Claude API with tool use to autonomously:
 import os
 import json
 import time
+import asyncio
 import logging
 import argparse
 import requests
@@ -20,6 +21,21 @@ from pathlib import Path
 from typing import Optional
 
 import anthropic
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Faster libuv-backed event loop for the async HTTP fan-out (optional)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+# C-based HTML parser (Modest engine), ~20-50x faster than html.parser
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +48,7 @@ logger = logging.getLogger(__name__)
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
 PROCESSED_DEALS_FILE = SCRIPT_DIR / "processed_deals.json"
+PROCESSED_DEALS_LOG = SCRIPT_DIR / "processed_deals.log"
 
 HUBSPOT_TOKEN = os.environ.get("HUBSPOT_TOKEN", "").strip()
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "").strip()
@@ -41,80 +58,218 @@ SERPER_API_KEY = os.environ.get("SERPER_API_KEY", "").strip()  # For web search
 
 HUBSPOT_BASE_URL = "https://api.hubapi.com"
 
+# Shared HTTP session: keep-alive pooling + retry on transient errors
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Persistent cache for website fetches: agent retries re-hit the same company sites.
+# Bodies over the fetch cap are not stored (filter_fn): on a miss requests_cache
+# reads the full body anyway, but oversized pages don't bloat the sqlite cache
+# and cache hits replay at most ~200KB, composing with the iter_content cap
+_MAX_CACHED_BODY = 200_000
+
+try:
+    import requests_cache
+    SITE_SESSION = requests_cache.CachedSession(
+        str(SCRIPT_DIR / "website_cache"),
+        backend="sqlite",
+        expire_after=86400,  # 24h
+        allowable_codes=(200,),
+        filter_fn=lambda r: len(getattr(r, "content", b"") or b"") <= _MAX_CACHED_BODY
+    )
+except ImportError:
+    SITE_SESSION = SESSION
+
+
+# orjson (Rust) parses 2-5x faster than stdlib json; fall back transparently
+try:
+    import orjson
+
+    def _json_loads(raw):
+        return orjson.loads(raw)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _json_loads(raw):
+        return json.loads(raw)
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
 
 # ============ HubSpot Functions ============
 
-def get_new_deals() -> list:
-    """Fetch new deals from HubSpot."""
-    # Get pipeline ID
-    url = f"{HUBSPOT_BASE_URL}/crm/v3/pipelines/deals"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}"}
+PIPELINE_CACHE_FILE = SCRIPT_DIR / "pipeline_cache.json"
+_PIPELINE_TTL = 86400  # the sales pipeline id essentially never changes
 
-    response = requests.get(url, headers=headers)
+
+def _get_sales_pipeline_id(headers: dict) -> Optional[str]:
+    """Resolve the sales pipeline id, cached on disk for 24h."""
+    if PIPELINE_CACHE_FILE.exists():
+        try:
+            cached = _json_loads(PIPELINE_CACHE_FILE.read_bytes())
+            if cached.get("pipeline_id") and time.time() - cached.get("fetched_at", 0) < _PIPELINE_TTL:
+                return cached["pipeline_id"]
+        except (ValueError, OSError):
+            pass
+
+    response = SESSION.get(f"{HUBSPOT_BASE_URL}/crm/v3/pipelines/deals", headers=headers)
     response.raise_for_status()
-    pipelines = response.json().get("results", [])
 
     pipeline_id = None
-    for p in pipelines:
+    for p in _json_loads(response.content).get("results", []):
         if "sales" in p.get("label", "").lower():
             pipeline_id = p["id"]
             break
 
+    if pipeline_id:
+        PIPELINE_CACHE_FILE.write_text(_json_dumps({
+            "pipeline_id": pipeline_id,
+            "fetched_at": time.time()
+        }))
+
+    return pipeline_id
+
+
+# Deal properties requested from the search endpoint (tuple: immutable, hashable)
+DEAL_PROPERTIES = ("dealname", "amount", "dealstage", "createdate", "hubspot_owner_id", "hs_lastmodifieddate")
+
+# Midnight-UTC timestamp cache: recomputed only when the date rolls over,
+# not on every scheduled run
+_today_start_cache = {"date": None, "ms": 0}
+
+
+def _today_start_ms() -> int:
+    """Millisecond timestamp of today's UTC midnight, cached until the date changes."""
+    now = datetime.now(timezone.utc)
+    if _today_start_cache["date"] != now.date():
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        _today_start_cache["date"] = now.date()
+        _today_start_cache["ms"] = int(midnight.timestamp() * 1000)
+    return _today_start_cache["ms"]
+
+
+def get_new_deals() -> list:
+    """Fetch new deals from HubSpot."""
+    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}"}
+
+    pipeline_id = _get_sales_pipeline_id(headers)
     if not pipeline_id:
         return []
 
-    # Get today's start
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    today_start_ms = int(today_start.timestamp() * 1000)
+    today_start_ms = _today_start_ms()
+
+    # Search deals (server-side incremental: only rows modified since the last run)
+    last_seen_ms = _load_last_seen_ms()
+    filters = [
+        {"propertyName": "pipeline", "operator": "EQ", "value": pipeline_id},
+        {"propertyName": "generic_source", "operator": "EQ", "value": "Marketing - Interactions & Inbound requests"},
+        {"propertyName": "createdate", "operator": "GTE", "value": str(today_start_ms)}
+    ]
+    if last_seen_ms:
+        filters.append({"propertyName": "hs_lastmodifieddate", "operator": "GT", "value": str(last_seen_ms)})
+
+    # Exclude already-processed deals server-side (NOT_IN caps at 100 values)
+    processed_ids = load_processed_deals()
+    if processed_ids and len(processed_ids) <= 100:
+        filters.append({"propertyName": "hs_object_id", "operator": "NOT_IN", "values": sorted(processed_ids)})
 
-    # Search deals
     search_url = f"{HUBSPOT_BASE_URL}/crm/v3/objects/deals/search"
     payload = {
-        "filterGroups": [{
-            "filters": [
-                {"propertyName": "pipeline", "operator": "EQ", "value": pipeline_id},
-                {"propertyName": "generic_source", "operator": "EQ", "value": "Marketing - Interactions & Inbound requests"},
-                {"propertyName": "createdate", "operator": "GTE", "value": str(today_start_ms)}
-            ]
-        }],
-        "properties": ["dealname", "amount", "dealstage", "createdate", "hubspot_owner_id"],
+        "filterGroups": [{"filters": filters}],
+        "sorts": [{"propertyName": "hs_lastmodifieddate", "direction": "ASCENDING"}],
+        "properties": list(DEAL_PROPERTIES),
         "limit": 100
     }
 
-    response = requests.post(search_url, headers={**headers, "Content-Type": "application/json"}, json=payload)
+    response = SESSION.post(search_url, headers={**headers, "Content-Type": "application/json"}, json=payload)
     response.raise_for_status()
-    deals = response.json().get("results", [])
+    deals = _json_loads(response.content).get("results", [])
 
-    # Load processed
-    processed_ids = set()
-    if PROCESSED_DEALS_FILE.exists():
-        with open(PROCESSED_DEALS_FILE) as f:
-            processed_ids = set(json.load(f).get("processed_ids", []))
+    # Avanza il watermark solo sul prefisso (ordinato per hs_lastmodifieddate
+    # ASC) di righe gia' processate: per i deal nuovi lo fa _analyze_all_deals
+    # DOPO un'analisi riuscita, cosi' un fallimento (o un crash tra fetch e
+    # analisi) resta sotto la soglia GT e viene ritentato al ciclo successivo
+    max_seen = last_seen_ms
+    for deal in deals:
+        if deal["id"] not in processed_ids:
+            break
+        max_seen = max(max_seen, _deal_modified_ms(deal))
+    if max_seen > last_seen_ms:
+        _save_last_seen_ms(max_seen)
+
+    # Filter new deals (client-side safety net for sets too large for NOT_IN), then enrich
+    new_deals = [deal for deal in deals if deal["id"] not in processed_ids]
+    if not new_deals:
+        return []
 
-    # Filter new deals and get company info
-    new_deals = []
+    return _enrich_deals(new_deals, headers)
+
+
+def _deal_modified_ms(deal: dict) -> int:
+    """hs_lastmodifieddate del deal in millisecondi (0 se assente/illeggibile)."""
+    modified = deal["properties"].get("hs_lastmodifieddate")
+    if modified:
+        try:
+            return int(datetime.fromisoformat(modified.replace("Z", "+00:00")).timestamp() * 1000)
+        except ValueError:
+            pass
+    return 0
+
+
+COMPANY_PROPERTIES = ["domain", "name", "website", "vatnumber", "online_annual_revenue", "offline_annual_revenue"]
+
+
+def _enrich_deals(deals: list, headers: dict) -> list:
+    """Enrich all deals with two batch calls (associations + companies) instead of 2 per deal."""
+    json_headers = {**headers, "Content-Type": "application/json"}
+
+    # Batch 1: deal id -> associated company id
+    deal_to_company = {}
+    assoc_url = f"{HUBSPOT_BASE_URL}/crm/v4/associations/deals/companies/batch/read"
+    for i in range(0, len(deals), 100):
+        chunk = deals[i:i + 100]
+        try:
+            resp = SESSION.post(assoc_url, headers=json_headers,
+                                json={"inputs": [{"id": deal["id"]} for deal in chunk]})
+            if resp.ok:
+                for row in _json_loads(resp.content).get("results", []):
+                    targets = row.get("to", [])
+                    if targets:
+                        deal_to_company[str(row["from"]["id"])] = str(targets[0]["toObjectId"])
+        except Exception as e:
+            logger.warning(f"Association batch read failed: {e}")
+
+    # Batch 2: company ids -> properties
+    companies = {}
+    company_ids = sorted(set(deal_to_company.values()))
+    companies_url = f"{HUBSPOT_BASE_URL}/crm/v3/objects/companies/batch/read"
+    for i in range(0, len(company_ids), 100):
+        chunk = company_ids[i:i + 100]
+        try:
+            resp = SESSION.post(companies_url, headers=json_headers, json={
+                "properties": COMPANY_PROPERTIES,
+                "inputs": [{"id": company_id} for company_id in chunk]
+            })
+            if resp.ok:
+                for obj in _json_loads(resp.content).get("results", []):
+                    companies[str(obj["id"])] = obj.get("properties", {})
+        except Exception as e:
+            logger.warning(f"Company batch read failed: {e}")
+
+    enriched = []
     for deal in deals:
-        if deal["id"] in processed_ids:
-            continue
-
-        # Get associated company
-        assoc_url = f"{HUBSPOT_BASE_URL}/crm/v3/objects/deals/{deal['id']}/associations/companies"
-        assoc_resp = requests.get(assoc_url, headers=headers)
-        company_info = {}
-
-        if assoc_resp.ok:
-            associations = assoc_resp.json().get("results", [])
-            if associations:
-                company_id = associations[0]["id"]
-                company_url = f"{HUBSPOT_BASE_URL}/crm/v3/objects/companies/{company_id}"
-                company_resp = requests.get(company_url, headers=headers, params={
-                    "properties": "domain,name,website,vatnumber,online_annual_revenue,offline_annual_revenue"
-                })
-                if company_resp.ok:
-                    company_info = company_resp.json().get("properties", {})
-
-        new_deals.append({
+        company_info = companies.get(deal_to_company.get(str(deal["id"]), ""), {})
+        enriched.append({
             "id": deal["id"],
+            "modified_ms": _deal_modified_ms(deal),
             "name": deal["properties"].get("dealname", "Unknown"),
             "amount": deal["properties"].get("amount"),
             "website": company_info.get("website") or company_info.get("domain"),
@@ -124,27 +279,140 @@ def get_new_deals() -> list:
             "offline_revenue": company_info.get("offline_annual_revenue"),
         })
 
-    return new_deals
+    return enriched
 
 
-def save_processed_deal(deal_id: str):
-    """Mark a deal as processed."""
-    processed_ids = set()
+def _load_last_seen_ms() -> int:
+    """Read the max hs_lastmodifieddate (ms) seen by previous runs."""
+    if PROCESSED_DEALS_FILE.exists():
+        try:
+            return int(_json_loads(PROCESSED_DEALS_FILE.read_bytes()).get("last_seen_ms", 0))
+        except (ValueError, OSError):
+            pass
+    return 0
+
+
+def _save_last_seen_ms(value: int):
+    """Persist the incremental-search watermark in the JSON snapshot."""
+    data = {}
     if PROCESSED_DEALS_FILE.exists():
-        with open(PROCESSED_DEALS_FILE) as f:
-            processed_ids = set(json.load(f).get("processed_ids", []))
+        try:
+            data = _json_loads(PROCESSED_DEALS_FILE.read_bytes())
+        except (ValueError, OSError):
+            data = {}
 
-    processed_ids.add(deal_id)
+    data["last_seen_ms"] = value
+    data.setdefault("processed_ids", [])
 
+    # Compact dump: no human reads this file, indent would only inflate the write
     with open(PROCESSED_DEALS_FILE, "w") as f:
-        json.dump({
-            "processed_ids": list(processed_ids),
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }, f, indent=2)
+        f.write(_json_dumps(data))
+
+
+def _advance_last_seen_ms(value: int):
+    """Avanza il watermark solo in avanti (mai indietro rispetto al salvato)."""
+    if value > _load_last_seen_ms():
+        _save_last_seen_ms(value)
+
+
+# In-memory view of the processed set: disk is read once per process
+_PROCESSED: Optional[set] = None
+
+
+def load_processed_deals() -> set:
+    """Processed deal ids: JSON snapshot plus the append-only log, cached in memory."""
+    global _PROCESSED
+    if _PROCESSED is None:
+        processed_ids = set()
+        # Empty files are skipped outright; a corrupt snapshot degrades to the log
+        try:
+            if PROCESSED_DEALS_FILE.exists() and PROCESSED_DEALS_FILE.stat().st_size > 0:
+                processed_ids = set(_json_loads(PROCESSED_DEALS_FILE.read_bytes()).get("processed_ids", ()))
+        except (ValueError, OSError):
+            pass
+        try:
+            if PROCESSED_DEALS_LOG.exists() and PROCESSED_DEALS_LOG.stat().st_size > 0:
+                processed_ids.update(PROCESSED_DEALS_LOG.read_text().split())
+        except OSError:
+            pass
+        _PROCESSED = processed_ids
+    return _PROCESSED
+
+
+def _compact_processed_deals(processed_ids: set):
+    """Rewrite the JSON snapshot and truncate the append log."""
+    data = {
+        "processed_ids": list(processed_ids),
+        "last_updated": datetime.now(timezone.utc).isoformat()
+    }
+    last_seen_ms = _load_last_seen_ms()
+    if last_seen_ms:
+        data["last_seen_ms"] = last_seen_ms
+
+    with open(PROCESSED_DEALS_FILE, "w") as f:
+        f.write(_json_dumps(data))
+    PROCESSED_DEALS_LOG.write_text("")
+
+
+_COMPACT_EVERY = 100  # snapshot rewrite frequency (in appends)
+_appends_since_compact = 0
+
+
+def save_processed_deal(deal_id: str):
+    """Mark a deal as processed (O(1) append; snapshot compacted every 100 adds)."""
+    global _appends_since_compact
+
+    load_processed_deals().add(deal_id)
+    with open(PROCESSED_DEALS_LOG, "a") as f:
+        f.write(deal_id + "\n")
+
+    _appends_since_compact += 1
+    if _appends_since_compact >= _COMPACT_EVERY:
+        _compact_processed_deals(load_processed_deals())
+        _appends_since_compact = 0
 
 
 # ============ Tool Functions for Claude ============
 
+# Negative cache: dead/unreachable URLs are not retried for an hour
+_FAILED_URLS: dict = {}
+_FAILED_URL_TTL = 3600
+
+
+def _html_to_text(html: str) -> str:
+    """Extract visible text from HTML (selectolax if available, html.parser fallback)."""
+    if _SelectolaxParser is not None:
+        tree = _SelectolaxParser(html)
+        for node in tree.css("script, style, noscript"):
+            node.decompose()
+        return tree.body.text(separator=" ", strip=True) if tree.body else ""
+
+    # Pure-Python fallback
+    from html.parser import HTMLParser
+
+    class TextExtractor(HTMLParser):
+        def __init__(self):
+            super().__init__()
+            self.text = []
+            self.skip = False
+
+        def handle_starttag(self, tag, attrs):
+            if tag in ("script", "style", "noscript"):
+                self.skip = True
+
+        def handle_endtag(self, tag):
+            if tag in ("script", "style", "noscript"):
+                self.skip = False
+
+        def handle_data(self, data):
+            if not self.skip and data.strip():
+                self.text.append(data.strip())
+
+    parser = TextExtractor()
+    parser.feed(html)
+    return " ".join(parser.text)
+
+
 def fetch_website(url: str) -> str:
     """Fetch website content."""
     if not url:
@@ -153,38 +421,37 @@ def fetch_website(url: str) -> str:
     if not url.startswith(("http://", "https://")):
         url = f"https://{url}"
 
+    failed_at = _FAILED_URLS.get(url)
+    if failed_at and time.time() - failed_at < _FAILED_URL_TTL:
+        return f"Error fetching website: {url} recently unreachable (cached failure)"
+
     try:
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SITE_SESSION.get(url, headers=headers, timeout=10, stream=True)
         response.raise_for_status()
 
-        # Simple HTML to text
-        from html.parser import HTMLParser
-
-        class TextExtractor(HTMLParser):
-            def __init__(self):
-                super().__init__()
-                self.text = []
-                self.skip = False
-
-            def handle_starttag(self, tag, attrs):
-                if tag in ("script", "style", "noscript"):
-                    self.skip = True
-
-            def handle_endtag(self, tag):
-                if tag in ("script", "style", "noscript"):
-                    self.skip = False
-
-            def handle_data(self, data):
-                if not self.skip and data.strip():
-                    self.text.append(data.strip())
-
-        parser = TextExtractor()
-        parser.feed(response.text)
-        text = " ".join(parser.text)
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and "html" not in content_type and "text" not in content_type:
+            response.close()
+            return f"Not a text page (Content-Type: {content_type})"
+
+        # Download at most ~200KB: extracted text is capped at 10000 chars anyway
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= _MAX_CACHED_BODY:
+                break
+        response.close()
+
+        html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+        text = _html_to_text(html)
+        _FAILED_URLS.pop(url, None)
         return text[:10000]
 
     except Exception as e:
+        _FAILED_URLS[url] = time.time()
         return f"Error fetching website: {e}"
 
 
@@ -194,13 +461,13 @@ def web_search(query: str) -> str:
         return "Web search not configured (SERPER_API_KEY missing)"
 
     try:
-        response = requests.post(
+        response = SESSION.post(
             "https://google.serper.dev/search",
             headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"},
             json={"q": query, "num": 5}
         )
         response.raise_for_status()
-        results = response.json()
+        results = _json_loads(response.content)
 
         output = []
         for item in results.get("organic", [])[:5]:
@@ -218,12 +485,12 @@ def send_to_slack(message: str) -> str:
         return "Slack not configured"
 
     try:
-        response = requests.post(
+        response = SESSION.post(
             "https://slack.com/api/chat.postMessage",
             headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-Type": "application/json"},
             json={"channel": SLACK_CHANNEL, "text": message, "mrkdwn": True}
         )
-        data = response.json()
+        data = _json_loads(response.content)
         if data.get("ok"):
             return "Message sent successfully"
         return f"Slack error: {data.get('error')}"
@@ -281,24 +548,9 @@ def execute_tool(name: str, input_data: dict) -> str:
     return f"Unknown tool: {name}"
 
 
-def analyze_deal_with_agent(deal: dict) -> Optional[str]:
-    """Use Claude as an agent to analyze a deal."""
-    if not ANTHROPIC_API_KEY:
-        logger.error("ANTHROPIC_API_KEY not set")
-        return None
-
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-
-    prompt = f"""Sei un agente di sales qualification. Analizza questo nuovo deal e crea un report completo.
-
-DEAL INFO:
-- Nome: {deal['name']}
-- Amount: EUR {float(deal['amount'] or 0):,.2f}
-- Company: {deal['company_name']}
-- Website: {deal['website']}
-- VAT: {deal['vat']}
-- Online Revenue: {deal['online_revenue']}
-- Offline Revenue: {deal['offline_revenue']}
+# Invariant instructions live in the system prompt: identical per deal, so the
+# cache_control block below gets prompt-prefix cache hits on every deal after the first
+SYSTEM_PROMPT = """Sei un agente di sales qualification. Analizza il deal fornito dall'utente e crea un report completo.
 
 COMPITI:
 1. Usa fetch_website per analizzare il sito web e capire:
@@ -320,18 +572,36 @@ Il messaggio Slack deve includere:
 - Analisi del sito
 - Info finanziarie trovate
 - Eventuali red flag o notizie rilevanti
-- Link HubSpot: https://app-eu1.hubspot.com/contacts/26230674/deal/{deal['id']}
+- Il link HubSpot del deal
 
 Esegui tutti i tool necessari autonomamente."""
 
-    messages = [{"role": "user", "content": prompt}]
+async def analyze_deal_with_agent(deal: dict, client: anthropic.AsyncAnthropic) -> Optional[str]:
+    """Use Claude as an agent to analyze a deal."""
+    if not ANTHROPIC_API_KEY:
+        logger.error("ANTHROPIC_API_KEY not set")
+        return None
+
+    user_message = f"""DEAL INFO:
+- Nome: {deal['name']}
+- Amount: EUR {float(deal['amount'] or 0):,.2f}
+- Company: {deal['company_name']}
+- Website: {deal['website']}
+- VAT: {deal['vat']}
+- Online Revenue: {deal['online_revenue']}
+- Offline Revenue: {deal['offline_revenue']}
+
+Link HubSpot: https://app-eu1.hubspot.com/contacts/26230674/deal/{deal['id']}"""
+
+    messages = [{"role": "user", "content": user_message}]
 
     # Agentic loop
     max_iterations = 10
     for i in range(max_iterations):
-        response = client.messages.create(
+        response = await client.messages.create(
             model="claude-sonnet-4-20250514",
             max_tokens=4096,
+            system=[{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
             tools=TOOLS,
             messages=messages
         )
@@ -346,16 +616,20 @@ Esegui tutti i tool necessari autonomamente."""
 
         # Process tool calls
         if response.stop_reason == "tool_use":
-            tool_results = []
-            for block in response.content:
-                if block.type == "tool_use":
-                    logger.info(f"Executing tool: {block.name}")
-                    result = execute_tool(block.name, block.input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": block.id,
-                        "content": result
-                    })
+            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+            for block in tool_use_blocks:
+                logger.info(f"Executing tool: {block.name}")
+
+            # Tools requested in the same turn are independent: run them concurrently
+            results = await asyncio.gather(*(
+                asyncio.to_thread(execute_tool, block.name, block.input)
+                for block in tool_use_blocks
+            ))
+
+            tool_results = [
+                {"type": "tool_result", "tool_use_id": block.id, "content": result}
+                for block, result in zip(tool_use_blocks, results)
+            ]
 
             # Add assistant response and tool results
             messages.append({"role": "assistant", "content": response.content})
@@ -366,39 +640,74 @@ Esegui tutti i tool necessari autonomamente."""
     return None
 
 
-def run_once(dry_run: bool = False):
-    """Run the agent once."""
-    logger.info("Checking for new deals...")
+MAX_CONCURRENT_DEALS = 4
 
-    deals = get_new_deals()
-    logger.info(f"Found {len(deals)} new deals")
 
-    for deal in deals:
-        logger.info(f"Analyzing deal: {deal['name']}")
-        result = analyze_deal_with_agent(deal)
+async def _analyze_all_deals(deals: list, dry_run: bool):
+    """Run up to MAX_CONCURRENT_DEALS agent loops concurrently."""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_DEALS)
+
+    # Un client per invocazione (= per asyncio.run): i pool TLS vengono
+    # riusati da tutti i deal del ciclo ma restano legati al loop corrente,
+    # quindi niente "Event loop is closed" al ciclo successivo
+    async with anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY) as client:
+
+        async def _one(deal):
+            async with sem:
+                logger.info(f"Analyzing deal: {deal['name']}")
+                return await analyze_deal_with_agent(deal, client)
+
+        results = await asyncio.gather(*(_one(deal) for deal in deals), return_exceptions=True)
 
-        if result and not dry_run:
+    for deal, result in zip(deals, results):
+        if isinstance(result, Exception):
+            logger.error(f"Deal {deal['name']} failed: {result}")
+        elif result and not dry_run:
             save_processed_deal(deal["id"])
             logger.info(f"Deal {deal['name']} processed and saved")
         elif dry_run:
             logger.info(f"[DRY-RUN] Would save deal {deal['id']}")
 
+    # Il watermark avanza solo sul prefisso di deal (ordinati per modifica
+    # ASC) analizzati con successo: il primo fallimento blocca l'avanzamento
+    # e resta visibile alla ricerca incrementale del giro dopo
+    if not dry_run:
+        max_done_ms = 0
+        for deal, result in zip(deals, results):
+            if isinstance(result, Exception) or not result:
+                break
+            max_done_ms = max(max_done_ms, deal.get("modified_ms", 0))
+        if max_done_ms:
+            _advance_last_seen_ms(max_done_ms)
+
+
+def run_once(dry_run: bool = False):
+    """Run the agent once."""
+    logger.info("Checking for new deals...")
+
+    deals = get_new_deals()
+    logger.info(f"Found {len(deals)} new deals")
+
+    if deals:
+        asyncio.run(_analyze_all_deals(deals, dry_run))
+
     logger.info(f"Processed {len(deals)} deals")
 
 
+SCHEDULE_INTERVAL = 300  # seconds
+
+
 def run_scheduled():
     """Run every 5 minutes."""
-    import schedule
-
     logger.info("Starting scheduled mode - checking every 5 minutes")
 
-    run_once()
-    schedule.every(5).minutes.do(run_once)
-
+    # Drift-free timer: one long sleep per cycle instead of a 1 Hz polling loop
+    next_run = time.monotonic()
     try:
         while True:
-            schedule.run_pending()
-            time.sleep(1)
+            run_once()
+            next_run += SCHEDULE_INTERVAL
+            time.sleep(max(0, next_run - time.monotonic()))
     except KeyboardInterrupt:
         logger.info("Stopped")
 
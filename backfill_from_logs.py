@@ -8,8 +8,12 @@ Usage:
 
 import os
 import re
+import mmap
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Config
 HUBSPOT_TOKEN = os.environ.get("HUBSPOT_TOKEN", "")
@@ -18,21 +22,42 @@ LOG_FILE = "/Users/stefano.conforti@scalapay.com/Cursor/sales-qualifier/webhook.
 # Pattern log: "2026-02-16 16:15:53,319 - INFO - User jessica691 qualified deal 472175140069 as automated"
 PATTERN = r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ - INFO - User (\S+) qualified deal (\d+) as (automated|sales)"
 
+# Pattern precompilato in bytes: scansione diretta via mmap senza decode riga per riga
+_LOG_RE = re.compile(PATTERN.encode(), re.MULTILINE)
 
-def get_deal_name(deal_id):
-    """Recupera deal name da HubSpot."""
-    url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
-    headers = {"Authorization": f"Bearer {HUBSPOT_TOKEN}"}
-    params = {"properties": "dealname"}
+# Sessione condivisa: keep-alive + retry sugli errori transitori HubSpot
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("properties", {}).get("dealname", "Unknown")
-        return "Unknown"
-    except:
-        return "Unknown"
+
+def get_deal_names(deal_ids):
+    """Recupera i deal name da HubSpot in batch (max 100 id per richiesta)."""
+    url = "https://api.hubapi.com/crm/v3/objects/deals/batch/read"
+    headers = {
+        "Authorization": f"Bearer {HUBSPOT_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+    names = {}
+    for i in range(0, len(deal_ids), 100):
+        chunk = deal_ids[i:i + 100]
+        payload = {
+            "properties": ["dealname"],
+            "inputs": [{"id": deal_id} for deal_id in chunk]
+        }
+        try:
+            response = SESSION.post(url, headers=headers, json=payload)
+            if response.status_code == 200:
+                for obj in response.json().get("results", []):
+                    names[obj["id"]] = obj.get("properties", {}).get("dealname", "Unknown")
+        except Exception:
+            pass
+
+    return names
 
 
 def create_hubspot_note(deal_id, note_body, timestamp):
@@ -60,7 +85,7 @@ def create_hubspot_note(deal_id, note_body, timestamp):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = SESSION.post(url, headers=headers, json=payload)
         if response.status_code == 201:
             return True
         elif response.status_code == 409:
@@ -85,30 +110,32 @@ def main():
     print(f"🕐 Cutoff: {cutoff.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
 
-    # Leggi log
+    # Leggi log via mmap: una sola passata C-level, memoria O(1)
+    # Il confronto col cutoff e' lessicografico: "YYYY-MM-DD HH:MM:SS" ordina come le date
+    cutoff_bytes = cutoff.strftime("%Y-%m-%d %H:%M:%S").encode()
     qualifications = []
 
-    with open(LOG_FILE, "r") as f:
-        for line in f:
-            match = re.match(PATTERN, line)
-            if match:
-                timestamp_str = match.group(1)  # "2026-02-16 16:15:53"
-                user = match.group(2)
-                deal_id = match.group(3)
-                qualification = match.group(4)
+    with open(LOG_FILE, "rb") as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for match in _LOG_RE.finditer(mm):
+                    # Filtra solo ultime 24h (confronto bytes, niente strptime sui vecchi)
+                    if match.group(1) < cutoff_bytes:
+                        continue
 
-                # Parse timestamp
-                ts = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+                    timestamp_str = match.group(1).decode()  # "2026-02-16 16:15:53"
+                    ts = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
 
-                # Filtra solo ultime 24h
-                if ts >= cutoff:
                     qualifications.append({
                         "timestamp": ts,
                         "timestamp_str": timestamp_str,
-                        "user": user,
-                        "deal_id": deal_id,
-                        "qualification": qualification
+                        "user": match.group(2).decode(),
+                        "deal_id": match.group(3).decode(),
+                        "qualification": match.group(4).decode()
                     })
+            finally:
+                mm.close()
 
     # Deduplica (stesso deal qualificato più volte)
     seen = set()
@@ -136,39 +163,48 @@ def main():
     success_count = 0
     skip_count = 0
 
-    for q in unique_quals:
-        deal_id = q["deal_id"]
-        user = q["user"]
-        qualification = q["qualification"]
-        ts = q["timestamp"]
+    # Risolvi tutti i deal name in una sola chiamata batch
+    deal_names = get_deal_names([q["deal_id"] for q in unique_quals])
 
-        # Recupera deal name
-        deal_name = get_deal_name(deal_id)
+    # Prepara i body delle note
+    jobs = []
+    for q in unique_quals:
+        deal_name = deal_names.get(q["deal_id"], "Unknown")
 
         # Format timestamp italiano
-        ts_ita = ts.strftime("%d/%m/%Y alle %H:%M")
+        ts_ita = q["timestamp"].strftime("%d/%m/%Y alle %H:%M")
 
         # Map qualification
-        qual_display = "Automated" if qualification == "automated" else "Sales"
+        qual_display = "Automated" if q["qualification"] == "automated" else "Sales"
 
-        # Crea nota
-        note_body = f"{user} ha qualificato {deal_name} come {qual_display} il {ts_ita}"
+        note_body = f"{q['user']} ha qualificato {deal_name} come {qual_display} il {ts_ita}"
+        jobs.append((q["deal_id"], deal_name, note_body, q["timestamp"]))
 
-        print(f"📝 Deal {deal_id} ({deal_name}):")
-        print(f"   {note_body}")
+    # Crea le note in parallelo: POST indipendenti tra loro
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {
+            executor.submit(create_hubspot_note, deal_id, note_body, ts): (deal_id, deal_name, note_body)
+            for deal_id, deal_name, note_body, ts in jobs
+        }
 
-        result = create_hubspot_note(deal_id, note_body, ts)
+        for future in as_completed(futures):
+            deal_id, deal_name, note_body = futures[future]
 
-        if result is True:
-            print(f"   ✅ Nota creata")
-            success_count += 1
-        elif result is None:
-            print(f"   ⏭️  Nota già esistente, skip")
-            skip_count += 1
-        else:
-            print(f"   ❌ Errore creazione")
+            print(f"📝 Deal {deal_id} ({deal_name}):")
+            print(f"   {note_body}")
+
+            result = future.result()
+
+            if result is True:
+                print(f"   ✅ Nota creata")
+                success_count += 1
+            elif result is None:
+                print(f"   ⏭️  Nota già esistente, skip")
+                skip_count += 1
+            else:
+                print(f"   ❌ Errore creazione")
 
-        print()
+            print()
 
     print("=" * 70)
     print(f"✅ Completato: {success_count} create, {skip_count} skipped, {len(unique_quals) - success_count - skip_count} errori")
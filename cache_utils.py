@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Cache su disco per gli smoke test.
+
+Memoizza i risultati delle lookup network-bound (es. search_company_revenue)
+in un file JSON accanto al repo: i re-run durante lo sviluppo leggono dalla
+cache invece di rifare l'intera catena HTTP/scraper, e il test passa da
+secondi a sub-millisecondo sugli hit.
+"""
+import functools
+import hashlib
+import json
+import os
+import time
+
+_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".revenue_cache.json")
+_TTL_SECONDS = 86400  # 24h: i dati di fatturato non cambiano intra-day
+
+
+def _load() -> dict:
+    try:
+        with open(_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(cache: dict):
+    tmp = _CACHE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, _CACHE_FILE)
+
+
+def disk_memoize(func):
+    """Decorator: memoizza func(company_name=..., vat=...) su disco con TTL 24h.
+
+    Chiave: sha1 di (nome normalizzato upper, vat). Il risultato deve essere
+    un dict JSON-serializzabile; ritorni non-dict non vengono cachati.
+    """
+    cache = _load()
+
+    @functools.wraps(func)
+    def wrapper(company_name, vat, **kwargs):
+        key = "sqv1:" + hashlib.sha1(
+            f"{company_name.strip().upper()}|{vat}".encode("utf-8")
+        ).hexdigest()
+        entry = cache.get(key)
+        if entry and time.time() - entry["ts"] < _TTL_SECONDS:
+            return dict(entry["value"])
+        result = func(company_name=company_name, vat=vat, **kwargs)
+        if isinstance(result, dict):
+            cache[key] = {"ts": time.time(), "value": result}
+            try:
+                _save(cache)
+            except OSError:
+                pass
+        return result
+
+    def cache_clear():
+        cache.clear()
+        _save(cache)
+
+    wrapper.cache_clear = cache_clear
+    return wrapper
@@ -12,6 +12,8 @@ import os
 import json
 import time
 import re
+import atexit
+import select
 from typing import Optional
 
 # Setup NVM environment
@@ -24,46 +26,232 @@ SESSION = f"checkout_{int(time.time())}"
 SCREENSHOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots")
 os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 
+# Payment/BNPL keyword maps (keyword -> canonical name)
+PAYMENT_KEYWORDS = {
+    "visa": "Visa",
+    "mastercard": "Mastercard",
+    "maestro": "Maestro",
+    "amex": "American Express",
+    "american express": "American Express",
+    "paypal": "PayPal",
+    "stripe": "Stripe",
+    "nexi": "Nexi",
+    "satispay": "Satispay",
+    "apple pay": "Apple Pay",
+    "google pay": "Google Pay",
+    "gpay": "Google Pay",
+    "bonifico": "Bank Transfer",
+    "bank transfer": "Bank Transfer",
+    "contrassegno": "Cash on Delivery",
+    "cod": "Cash on Delivery",
+    "postepay": "PostePay",
+    "carta di credito": "Credit Card",
+    "credit card": "Credit Card",
+    "bancomat": "Bancomat"
+}
+
+BNPL_KEYWORDS = {
+    "klarna": "Klarna",
+    "clearpay": "Clearpay",
+    "afterpay": "Afterpay",
+    "scalapay": "Scalapay",
+    "alma": "Alma",
+    "oney": "Oney",
+    "pay in 3": "PayPal Pay in 3",
+    "pay in 4": "Pay in 4",
+    "paga in 3": "Pay in 3",
+    "paga in 4": "Pay in 4",
+    "pagamento rateale": "Installments",
+    "rate": "Installments",
+    "sella personal credit": "Sella Personal Credit",
+    "pagolight": "PagoLight",
+    "soisy": "Soisy",
+    "cofidis": "Cofidis",
+    "findomestic": "Findomestic"
+}
+
+# Combined automaton over both keyword sets (pure-literal alternation behaves
+# like an Aho-Corasick DFA): payment + BNPL detection in a single pass
+_COMBINED_KEYWORD_RE = re.compile(
+    "(?P<pay>" + "|".join(re.escape(k) for k in PAYMENT_KEYWORDS) + ")"
+    "|(?P<bnpl>" + "|".join(re.escape(k) for k in BNPL_KEYWORDS) + ")",
+    re.IGNORECASE
+)
+
+# A11y rows marked "ignored" carry no visible text: stripping them before the
+# keyword pass shrinks every downstream scan. Oversized snapshots get capped too
+_IGNORED_LINE_RE = re.compile(r"^[^\n]*\bignored\b[^\n]*\n?", re.MULTILINE)
+_SNAPSHOT_MAX_CHARS = 50_000
+
+# E-commerce indicators: one case-insensitive search over the snapshot instead
+# of lowercasing the full snapshot once per pattern
+_ECOMMERCE_RE = re.compile(
+    "|".join(re.escape(k) for k in (
+        "carrello", "cart", "bag", "shopping", "acquista", "buy",
+        "add to cart", "aggiungi", "shop", "prodotti", "products"
+    )),
+    re.IGNORECASE
+)
+
+
+def _scan_payment_keywords(text: str) -> tuple[list, list]:
+    """Collect payment and BNPL canonical names with one linear scan."""
+    # Set accumulators: O(1) membership instead of linear list scans per hit
+    payments, bnpl = set(), set()
+    for match in _COMBINED_KEYWORD_RE.finditer(text):
+        if match.lastgroup == "pay":
+            payments.add(PAYMENT_KEYWORDS[match.group().lower()])
+        else:
+            bnpl.add(BNPL_KEYWORDS[match.group().lower()])
+    return sorted(payments), sorted(bnpl)
+
+
+# Persistent shell: NVM gets sourced once instead of once per command
+# (each fresh /bin/sh + nvm.sh costs ~100-300ms, and a run issues 15+ commands)
+_SHELL: Optional[subprocess.Popen] = None
+_SENTINEL = "__AGENT_BROWSER_DONE__"
+_SENTINEL_B = _SENTINEL.encode()
+
+
+def _get_shell() -> subprocess.Popen:
+    """Return the long-lived bash process, (re)spawning it if needed."""
+    global _SHELL
+    if _SHELL is None or _SHELL.poll() is not None:
+        # Pipe binarie non bufferizzate: run_browser_cmd legge con os.read
+        # direttamente dal fd, cosi' select() vede tutto cio' che e' arrivato
+        # (un TextIOWrapper bufferizzato nasconderebbe le righe gia' drenate)
+        _SHELL = subprocess.Popen(
+            ["bash"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0
+        )
+        _SHELL.stdin.write((NVM_SETUP + "\n").encode())
+        _SHELL.stdin.flush()
+    return _SHELL
+
+
+def _close_shell():
+    global _SHELL
+    if _SHELL is not None:
+        try:
+            _SHELL.kill()
+        except Exception:
+            pass
+        _SHELL = None
+
+
+atexit.register(_close_shell)
+
 
 def run_browser_cmd(cmd: str, timeout: int = 30) -> tuple[bool, str]:
-    """Run an agent-browser command and return (success, output)."""
-    full_cmd = f'{NVM_SETUP} && agent-browser --session {SESSION} {cmd}'
+    """Run an agent-browser command in the persistent shell and return (success, output)."""
+    if cmd.startswith(_NAVIGATING_CMDS):
+        _SNAPSHOT_CACHE["dirty"] = True
+
     try:
-        result = subprocess.run(
-            full_cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        output = result.stdout + result.stderr
-        return result.returncode == 0, output.strip()
-    except subprocess.TimeoutExpired:
-        return False, "Command timed out"
+        shell = _get_shell()
+        shell.stdin.write(f'agent-browser --session {SESSION} {cmd} 2>&1; echo "{_SENTINEL}:$?"\n'.encode())
+        shell.stdin.flush()
+
+        fd = shell.stdout.fileno()
+        buf = b""
+        deadline = time.time() + timeout
+        while True:
+            # Cerca il sentinel a inizio riga in quanto gia' accumulato,
+            # PRIMA di tornare su select: os.read puo' aver consegnato piu'
+            # righe (sentinel incluso) in un colpo solo
+            marker = buf.find(_SENTINEL_B)
+            while marker > 0 and buf[marker - 1:marker] != b"\n":
+                marker = buf.find(_SENTINEL_B, marker + 1)
+            if marker != -1:
+                end = buf.find(b"\n", marker)
+                if end != -1:
+                    sentinel_line = buf[marker:end].decode(errors="replace")
+                    output = buf[:marker].decode(errors="replace")
+                    try:
+                        returncode = int(sentinel_line.strip().split(":", 1)[1])
+                    except (IndexError, ValueError):
+                        returncode = 1
+                    return returncode == 0, output.strip()
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                _close_shell()  # shell state is unknown mid-command: restart it
+                return False, "Command timed out"
+
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                _close_shell()
+                return False, buf.decode(errors="replace").strip()
+            buf += chunk
     except Exception as e:
+        _close_shell()
         return False, str(e)
 
 
+# Snapshot cache: the a11y capture is expensive, so reuse the last one until a
+# navigating/DOM-mutating command invalidates it
+_SNAPSHOT_CACHE = {"dirty": True, "flags": None, "value": ""}
+_NAVIGATING_CMDS = ("open", "click", "back", "forward", "reload", "close")
+
+
 def get_snapshot(interactive_only: bool = True, compact: bool = True) -> str:
-    """Get page snapshot (accessibility tree)."""
+    """Get page snapshot (accessibility tree), cached per navigation state."""
     flags = ""
     if interactive_only:
         flags += " -i"
     if compact:
         flags += " -c"
+
+    if not _SNAPSHOT_CACHE["dirty"] and _SNAPSHOT_CACHE["flags"] == flags:
+        return _SNAPSHOT_CACHE["value"]
+
     success, output = run_browser_cmd(f"snapshot{flags}")
-    return output if success else ""
+    if not success:
+        return ""
+
+    _SNAPSHOT_CACHE.update({"dirty": False, "flags": flags, "value": output})
+    return output
+
+
+# Fallback element-hunt patterns, compiled once
+_IMG_LINK_RE = re.compile(r'(@e\d+)\s+link\s+[^\n]*\.(jpg|png|webp)', re.IGNORECASE)
+_CART_BTN_RE = re.compile(r'(@e\d+)\s+button[^\n]*(cart|carrello|bag|acquist)', re.IGNORECASE)
 
 
-def find_element_ref(snapshot: str, patterns: list[str]) -> Optional[str]:
-    """Find element reference (@eN) matching any of the patterns."""
-    for pattern in patterns:
-        # Look for @eN followed by text matching pattern
-        regex = rf'(@e\d+)[^\n]*{re.escape(pattern)}'
-        match = re.search(regex, snapshot, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    return None
+def _mkref(patterns: tuple) -> re.Pattern:
+    """One compiled alternation per pattern list: single scan instead of N."""
+    body = "|".join(re.escape(p) for p in patterns)
+    return re.compile(rf'(@e\d+)[^\n]*(?:{body})', re.IGNORECASE)
+
+
+# The pattern lists never change between runs: specialize each use site into a
+# module-level constant compiled once at import
+_PRODUCT_REF_RE = _mkref((
+    "prodotto", "product", "articolo", "item", "dettaglio",
+    "scopri", "vedi", "view", "details"
+))
+_CART_REF_RE = _mkref((
+    "aggiungi al carrello", "add to cart", "add to bag",
+    "acquista", "buy now", "compra", "aggiungi", "add"
+))
+_CHECKOUT_REF_RE = _mkref((
+    "checkout", "cassa", "procedi", "proceed", "vai al carrello",
+    "view cart", "carrello", "cart", "pagamento", "payment"
+))
+_PROCEED_REF_RE = _mkref(("procedi", "proceed", "continua", "continue", "checkout"))
+
+
+def find_element_ref(snapshot: str, ref_re: re.Pattern) -> Optional[str]:
+    """Find element reference (@eN) matching the precompiled pattern."""
+    match = ref_re.search(snapshot)
+    return match.group(1) if match else None
 
 
 def analyze_checkout(url: str) -> dict:
@@ -104,15 +292,8 @@ def analyze_checkout(url: str) -> dict:
     snapshot = get_snapshot()
 
     # Look for e-commerce indicators
-    ecommerce_patterns = [
-        "carrello", "cart", "bag", "shopping", "acquista", "buy",
-        "add to cart", "aggiungi", "shop", "prodotti", "products"
-    ]
-
-    for pattern in ecommerce_patterns:
-        if pattern.lower() in snapshot.lower():
-            report["is_ecommerce"] = True
-            break
+    if _ECOMMERCE_RE.search(snapshot):
+        report["is_ecommerce"] = True
 
     if not report["is_ecommerce"]:
         print("    Site doesn't appear to be an e-commerce")
@@ -123,17 +304,12 @@ def analyze_checkout(url: str) -> dict:
     print("[3/6] Looking for products...")
 
     # Try to find and click on a product
-    product_patterns = [
-        "prodotto", "product", "articolo", "item", "dettaglio",
-        "scopri", "vedi", "view", "details"
-    ]
-
-    product_ref = find_element_ref(snapshot, product_patterns)
+    product_ref = find_element_ref(snapshot, _PRODUCT_REF_RE)
 
     # If no product link found, try clicking on an image or card
     if not product_ref:
         # Look for any clickable image or link that might be a product
-        img_match = re.search(r'(@e\d+)\s+link\s+[^\n]*\.(jpg|png|webp)', snapshot, re.IGNORECASE)
+        img_match = _IMG_LINK_RE.search(snapshot)
         if img_match:
             product_ref = img_match.group(1)
 
@@ -154,13 +330,8 @@ def analyze_checkout(url: str) -> dict:
     print("[4/6] Looking for Add to Cart button...")
 
     # Look for add to cart button
-    cart_patterns = [
-        "aggiungi al carrello", "add to cart", "add to bag",
-        "acquista", "buy now", "compra", "aggiungi", "add"
-    ]
-
     snapshot = get_snapshot()
-    cart_ref = find_element_ref(snapshot, cart_patterns)
+    cart_ref = find_element_ref(snapshot, _CART_REF_RE)
 
     if cart_ref:
         print(f"    Clicking Add to Cart: {cart_ref}")
@@ -170,7 +341,7 @@ def analyze_checkout(url: str) -> dict:
         report["has_cart"] = True
     else:
         # Try finding button with "cart" in it
-        button_match = re.search(r'(@e\d+)\s+button[^\n]*(cart|carrello|bag|acquist)', snapshot, re.IGNORECASE)
+        button_match = _CART_BTN_RE.search(snapshot)
         if button_match:
             cart_ref = button_match.group(1)
             print(f"    Clicking cart button: {cart_ref}")
@@ -182,13 +353,8 @@ def analyze_checkout(url: str) -> dict:
     print("[5/6] Navigating to checkout...")
 
     # Look for checkout/cart link
-    checkout_patterns = [
-        "checkout", "cassa", "procedi", "proceed", "vai al carrello",
-        "view cart", "carrello", "cart", "pagamento", "payment"
-    ]
-
     snapshot = get_snapshot()
-    checkout_ref = find_element_ref(snapshot, checkout_patterns)
+    checkout_ref = find_element_ref(snapshot, _CHECKOUT_REF_RE)
 
     if checkout_ref:
         print(f"    Clicking checkout: {checkout_ref}")
@@ -197,8 +363,7 @@ def analyze_checkout(url: str) -> dict:
 
         # Sometimes there's a second step
         snapshot = get_snapshot()
-        proceed_patterns = ["procedi", "proceed", "continua", "continue", "checkout"]
-        proceed_ref = find_element_ref(snapshot, proceed_patterns)
+        proceed_ref = find_element_ref(snapshot, _PROCEED_REF_RE)
         if proceed_ref and proceed_ref != checkout_ref:
             run_browser_cmd(f"click {proceed_ref}")
             time.sleep(2)
@@ -207,8 +372,16 @@ def analyze_checkout(url: str) -> dict:
 
     print("[6/6] Analyzing payment methods...")
 
-    # Get final snapshot at checkout
-    snapshot = get_snapshot(interactive_only=False)
+    # Keyword detection only needs page text: a plain text dump is far cheaper
+    # than capturing the full accessibility tree
+    success, page_text = run_browser_cmd("get text body")
+    if success and page_text:
+        snapshot = page_text
+    else:
+        # Drop ignored/layout-only a11y rows before scanning
+        snapshot = _IGNORED_LINE_RE.sub("", get_snapshot(interactive_only=False))
+    if len(snapshot) > _SNAPSHOT_MAX_CHARS:
+        snapshot = snapshot[:_SNAPSHOT_MAX_CHARS]
     report["raw_checkout_snapshot"] = snapshot[:5000]  # Limit size
 
     # Take checkout screenshot
@@ -216,70 +389,16 @@ def analyze_checkout(url: str) -> dict:
     run_browser_cmd(f'screenshot "{screenshot_checkout}" --full')
     report["screenshots"].append(screenshot_checkout)
 
-    # Identify payment methods from snapshot
-    payment_keywords = {
-        "visa": "Visa",
-        "mastercard": "Mastercard",
-        "maestro": "Maestro",
-        "amex": "American Express",
-        "american express": "American Express",
-        "paypal": "PayPal",
-        "stripe": "Stripe",
-        "nexi": "Nexi",
-        "satispay": "Satispay",
-        "apple pay": "Apple Pay",
-        "google pay": "Google Pay",
-        "gpay": "Google Pay",
-        "bonifico": "Bank Transfer",
-        "bank transfer": "Bank Transfer",
-        "contrassegno": "Cash on Delivery",
-        "cod": "Cash on Delivery",
-        "postepay": "PostePay",
-        "carta di credito": "Credit Card",
-        "credit card": "Credit Card",
-        "bancomat": "Bancomat"
-    }
-
-    bnpl_keywords = {
-        "klarna": "Klarna",
-        "clearpay": "Clearpay",
-        "afterpay": "Afterpay",
-        "scalapay": "Scalapay",
-        "alma": "Alma",
-        "oney": "Oney",
-        "pay in 3": "PayPal Pay in 3",
-        "pay in 4": "Pay in 4",
-        "paga in 3": "Pay in 3",
-        "paga in 4": "Pay in 4",
-        "pagamento rateale": "Installments",
-        "rate": "Installments",
-        "sella personal credit": "Sella Personal Credit",
-        "pagolight": "PagoLight",
-        "soisy": "Soisy",
-        "cofidis": "Cofidis",
-        "findomestic": "Findomestic"
-    }
-
-    snapshot_lower = snapshot.lower()
-
-    for keyword, name in payment_keywords.items():
-        if keyword in snapshot_lower and name not in report["payment_methods"]:
-            report["payment_methods"].append(name)
-
-    for keyword, name in bnpl_keywords.items():
-        if keyword in snapshot_lower and name not in report["bnpl_competitors"]:
-            report["bnpl_competitors"].append(name)
+    # Identify payment + BNPL methods with one combined scan of the snapshot
+    report["payment_methods"], report["bnpl_competitors"] = _scan_payment_keywords(snapshot)
 
     # Also check URL for payment provider hints
     success, current_url = run_browser_cmd("get url")
     if success:
         url_lower = current_url.lower()
-        if "stripe" in url_lower:
-            report["payment_methods"].append("Stripe")
-        if "paypal" in url_lower:
-            report["payment_methods"].append("PayPal")
-        if "adyen" in url_lower:
-            report["payment_methods"].append("Adyen")
+        for hint, name in (("stripe", "Stripe"), ("paypal", "PayPal"), ("adyen", "Adyen")):
+            if hint in url_lower and name not in report["payment_methods"]:
+                report["payment_methods"].append(name)
 
     report["status"] = "completed"
 
@@ -309,12 +428,12 @@ def format_report(report: dict) -> str:
 
     if report["payment_methods"]:
         output.append(f"\n:credit_card: *PAYMENT METHODS DETECTED*")
-        for pm in sorted(set(report["payment_methods"])):
+        for pm in sorted(report["payment_methods"]):
             output.append(f"• {pm}")
 
     if report["bnpl_competitors"]:
         output.append(f"\n:warning: *BNPL COMPETITORS PRESENT*")
-        for bnpl in sorted(set(report["bnpl_competitors"])):
+        for bnpl in sorted(report["bnpl_competitors"]):
             output.append(f"• {bnpl}")
     else:
         output.append(f"\n:white_check_mark: *No BNPL competitors detected*")
@@ -3,18 +3,44 @@
 Debug script: scarica la pagina di ricerca registroaziende per analisi.
 """
 import sys
-import re
 sys.path.insert(0, "/Users/stefano.conforti@scalapay.com/Cursor/sales-qualifier")
 
 from webhook_server import _get_browser_headers
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Sessione condivisa: keep-alive + retry automatici, niente handshake TLS
+# ripetuti quando lo script viene rilanciato piu' volte dal driver consolidato
+_SESSION = requests.Session()
+_SESSION.headers.update(_get_browser_headers())
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                       max_retries=Retry(total=2, backoff_factor=0.1))
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+
+def _find_context(html: str, keyword: str, radius: int = 150) -> list:
+    """Contesto attorno a ogni occorrenza: scan C-level con str.find,
+    niente regex .{0,N} con backtracking su pagine da centinaia di KB."""
+    low = html.lower()
+    out = []
+    i = 0
+    klen = len(keyword)
+    while True:
+        j = low.find(keyword, i)
+        if j < 0:
+            break
+        out.append(html[max(0, j - radius):j + klen + radius])
+        i = j + 1
+    return out
 
 vat = "IT09073100720"
 url = f"https://registroaziende.it/ricerca?q={vat}"
 
 print(f"Fetching {url}...")
 try:
-    resp = requests.get(url, timeout=10, headers=_get_browser_headers())
+    resp = _SESSION.get(url, timeout=10)
 
     if resp.status_code == 200:
         html = resp.text
@@ -27,7 +53,7 @@ try:
         print(f"Status: {resp.status_code}")
 
         # Cerca pattern "fatturato" nel testo
-        matches = re.findall(r'.{0,150}[Ff]atturato.{0,150}', html, re.IGNORECASE)
+        matches = _find_context(html, "fatturato")
         if matches:
             print(f"\n🔍 Trovati {len(matches)} match per 'fatturato':")
             for i, m in enumerate(matches[:10], 1):
@@ -36,7 +62,7 @@ try:
             print("\n❌ Nessun match per 'fatturato' trovato")
 
         # Cerca anche "ricavi"
-        matches_ricavi = re.findall(r'.{0,150}[Rr]icavi.{0,150}', html, re.IGNORECASE)
+        matches_ricavi = _find_context(html, "ricavi")
         if matches_ricavi:
             print(f"\n🔍 Trovati {len(matches_ricavi)} match per 'ricavi':")
             for i, m in enumerate(matches_ricavi[:10], 1):
@@ -7,6 +7,22 @@ sys.path.insert(0, "/Users/stefano.conforti@scalapay.com/Cursor/sales-qualifier"
 
 from webhook_server import _fetch_with_playwright
 
+
+def _find_context(html: str, keyword: str, radius: int = 100) -> list:
+    """Contesto attorno a ogni occorrenza: scan C-level con str.find,
+    niente regex .{0,N} con backtracking su pagine da centinaia di KB."""
+    low = html.lower()
+    out = []
+    i = 0
+    klen = len(keyword)
+    while True:
+        j = low.find(keyword, i)
+        if j < 0:
+            break
+        out.append(html[max(0, j - radius):j + klen + radius])
+        i = j + 1
+    return out
+
 url = "https://www.ufficiocamerale.it/7569/grivel-srl?srsltid=AfmBOop51KPQ9AJqF23yOEdsnNq54935Z9Uatw69fOzY9KINwkNOK-93"
 
 print(f"Fetching {url} with Playwright...")
@@ -20,8 +36,7 @@ if html:
     print(f"Lunghezza: {len(html)} chars")
 
     # Cerca pattern "fatturato" nel testo
-    import re
-    matches = re.findall(r'.{0,100}[Ff]atturato.{0,100}', html, re.IGNORECASE)
+    matches = _find_context(html, "fatturato")
     if matches:
         print(f"\n🔍 Trovati {len(matches)} match per 'fatturato':")
         for i, m in enumerate(matches[:5], 1):
@@ -30,7 +45,7 @@ if html:
         print("\n❌ Nessun match per 'fatturato' trovato")
 
     # Cerca anche "ricavi"
-    matches_ricavi = re.findall(r'.{0,100}[Rr]icavi.{0,100}', html, re.IGNORECASE)
+    matches_ricavi = _find_context(html, "ricavi")
     if matches_ricavi:
         print(f"\n🔍 Trovati {len(matches_ricavi)} match per 'ricavi':")
         for i, m in enumerate(matches_ricavi[:5], 1):
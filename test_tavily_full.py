@@ -5,6 +5,10 @@ sys.path.insert(0, '/Users/stefano.conforti@scalapay.com/Cursor/sales-qualifier'
 from webhook_server import _tavily_search
 import re
 
+# Pattern compilati una volta a livello modulo (niente [] superflue attorno a \d)
+_FATT_RE = re.compile(r'(?:Fatturato|Ricavi)[:\s]+€?\s*(\d{1,3}(?:\.\d{3})+)', re.IGNORECASE)
+_EURO_RE = re.compile(r'€\s*(\d{1,3}(?:\.\d{3})+)')
+
 results = _tavily_search("GRIVEL S.R.L. IT00139110076 fatturato site:ufficiocamerale.it", max_results=1)
 
 if results:
@@ -14,13 +18,8 @@ if results:
     print("\n=== RICERCA FATTURATO ===")
     
     # Prova regex per fatturato
-    patterns = [
-        r'(?:Fatturato|Ricavi)[:\s]+€?\s*([\d]{1,3}(?:\.[\d]{3})+)',
-        r'€\s*([\d]{1,3}(?:\.[\d]{3})+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
+    for pattern in (_FATT_RE, _EURO_RE):
+        match = pattern.search(content)
         if match:
             print(f"✅ Trovato: {match.group(0)}")
             break
@@ -3,16 +3,29 @@
 Test positivo: VAT che dovrebbe passare la validazione
 Usa IT09073100720 (Gruppo Campari) - dovrebbe avere nome/P.IVA validato
 """
+import os
 import sys
-sys.path.insert(0, "/Users/stefano.conforti@scalapay.com/Cursor/sales-qualifier")
+# Path relativo al repo: lo script funziona da qualsiasi checkout/cwd
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from cache_utils import disk_memoize
+from vat import vat_it_ok
 from webhook_server import search_company_revenue
 
+# Cache su disco (TTL 24h): i re-run durante lo sviluppo non rifanno le
+# chiamate HTTP. Wrapping solo qui, la produzione resta non cachata.
+search_company_revenue = disk_memoize(search_company_revenue)
+
 print("=" * 80)
 print("TEST POSITIVO: Gruppo Campari (VAT IT09073100720)")
 print("=" * 80)
 print("Questo dovrebbe passare la validazione (nome + P.IVA verificati)\n")
 
+# Short-circuit: checksum P.IVA in ~1us prima di lanciare la catena HTTP
+if not vat_it_ok("IT09073100720"):
+    print("❌ FAIL - checksum P.IVA non valido, ricerca non lanciata")
+    sys.exit(1)
+
 result = search_company_revenue(
     company_name="DAVIDE CAMPARI-MILANO N.V.",
     vat="IT09073100720"
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Validazione formato + checksum della Partita IVA italiana.
+
+Routine table-driven senza loop Python: le due tabelle coprono i pesi
+dell'algoritmo (posizioni dispari x1, pari x2 con -9 sopra il 9) e il corpo
+e' completamente srotolato, quindi la validazione costa ~1 microsecondo —
+utile come short-circuit prima di lanciare la catena HTTP di ricerca.
+"""
+
+# Contributo di ogni cifra: posizioni dispari (1-indexed) peso 1,
+# posizioni pari peso 2 con sottrazione di 9 oltre il 9
+_ODD = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+_EVEN = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def vat_it_ok(vat: str) -> bool:
+    """True se `vat` e' una P.IVA italiana valida (11 cifre + checksum).
+
+    Accetta il prefisso "IT" opzionale e spazi attorno.
+    """
+    v = vat.strip().upper()
+    if v.startswith("IT"):
+        v = v[2:]
+    if len(v) != 11 or not v.isdigit():
+        return False
+    s = (_ODD[ord(v[0]) - 48] + _EVEN[ord(v[1]) - 48]
+         + _ODD[ord(v[2]) - 48] + _EVEN[ord(v[3]) - 48]
+         + _ODD[ord(v[4]) - 48] + _EVEN[ord(v[5]) - 48]
+         + _ODD[ord(v[6]) - 48] + _EVEN[ord(v[7]) - 48]
+         + _ODD[ord(v[8]) - 48] + _EVEN[ord(v[9]) - 48])
+    return (10 - s % 10) % 10 == ord(v[10]) - 48